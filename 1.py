@@ -1,39 +1,123 @@
 # app_enhanced.py - Enhanced Flask Backend with Environment Variables
+import os
+
+# Cooperative I/O for gevent servers; the stdlib must be patched before anything
+# else imports it. gunicorn's gevent worker (see gunicorn.conf.py) patches on its own.
+if os.getenv('GEVENT_PATCH', '').lower() in ('1', 'true', 'yes'):
+    from gevent import monkey
+    monkey.patch_all()
+
+try:
+    from gevent import monkey as gevent_monkey
+    import gevent.threadpool
+except ImportError:
+    gevent_monkey = None
+
+# True when threads are greenlets (gevent worker or GEVENT_PATCH)
+GEVENT_ACTIVE = gevent_monkey is not None and gevent_monkey.is_module_patched('threading')
+
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-import os
+import atexit
+import hashlib
+import hmac
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.request import pathname2url
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import shutil
 from dotenv import load_dotenv
 import logging
+import logging.handlers
+
+try:
+    import orjson
+except ImportError:  # fall back to Flask's stdlib json provider
+    orjson = None
+
+try:
+    import apsw
+except ImportError:  # only needed when DB_BACKEND=apsw
+    apsw = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock for init_db
+    fcntl = None
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson, matching Flask's output format"""
+
+    def _option(self, pretty=False):
+        option = orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Pass orjson's bytes straight to the response, skipping a str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._option(pretty))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
 # Configuration from environment variables
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default-secret-key-change-in-production')
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 52428800))
 app.config['DATABASE'] = os.getenv('DATABASE_URL', 'church.db')
+app.config['DB_BACKEND'] = os.getenv('DB_BACKEND', 'sqlite3')
+
+if app.config['DB_BACKEND'] == 'apsw' and apsw is None:
+    raise RuntimeError("DB_BACKEND=apsw requires the apsw package")
 
 # CORS configuration
 allowed_origins = os.getenv('CORS_ORIGINS', '*').split(',')
 CORS(app, origins=allowed_origins)
 
-# Logging configuration
+# Logging configuration: request threads only enqueue records, and a listener
+# thread does the file/console writes
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.FileHandler(os.getenv('LOG_FILE', 'church_website.log')),
+    logging.StreamHandler(),
+    respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=os.getenv('LOG_LEVEL', 'INFO'),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.getenv('LOG_FILE', 'church_website.log')),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
@@ -42,20 +126,185 @@ ALLOWED_IMAGES = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 ALLOWED_VIDEOS = {'mp4', 'avi', 'mov', 'wmv', 'webm'}
 ALLOWED_DOCS = {'pdf', 'doc', 'docx'}
 
+# Dotted suffix tuples for str.endswith() checks in allowed_file
+IMAGE_SUFFIXES = tuple('.' + ext for ext in ALLOWED_IMAGES)
+VIDEO_SUFFIXES = tuple('.' + ext for ext in ALLOWED_VIDEOS)
+DOC_SUFFIXES = tuple('.' + ext for ext in ALLOWED_DOCS)
+
+# Public URL prefixes for uploaded media
+PHOTO_URL_PREFIX = '/uploads/photos/'
+VIDEO_URL_PREFIX = '/uploads/videos/'
+
+# Request bodies larger than this are streamed to disk in chunks of this size
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Worker threads shared by all requests for writing uploaded files to disk. Under
+# gevent these must be native threads: blocking writes never yield, so greenlets
+# would run the saves one after another and stall the worker's event loop.
+if GEVENT_ACTIVE:
+    _io_pool = gevent.threadpool.ThreadPoolExecutor(max_workers=8)
+else:
+    _io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='upload')
+
 # Create upload directories
 for folder in ['photos', 'videos', 'documents']:
     os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], folder), exist_ok=True)
 
+# SQLite's busy handler sleeps in C, which under gevent freezes every greenlet in
+# the worker. There it is kept short and writers wait for the write lock in
+# begin_immediate() with a cooperative sleep instead.
+BUSY_TIMEOUT_MS = 50 if GEVENT_ACTIVE else 5000
+WRITE_LOCK_TIMEOUT = 5.0  # seconds
+
+# Per-connection SQLite tuning (journal_mode is persistent and set in init_db)
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA foreign_keys=ON',
+)
+
+# Upload INSERT statements, shared so each connection's statement cache reuses them
+SQL_INSERT_PHOTO = 'INSERT INTO photos (filename, category, description, uploaded_by) VALUES (?, ?, ?, ?)'
+SQL_INSERT_VIDEO = 'INSERT INTO videos (filename, title, description, uploaded_by) VALUES (?, ?, ?, ?)'
+SQL_INSERT_DOCUMENT = 'INSERT INTO documents (filename, title, category, uploaded_by) VALUES (?, ?, ?, ?)'
+
+# List queries, kept as constants so pooled connections hit their statement cache
+SQL_NEWS_PUBLISHED = ('SELECT id, title, content, image_filename, author, created_at '
+                      'FROM news WHERE published = 1 ORDER BY created_at DESC')
+SQL_PHOTOS_ALL = ('SELECT id, filename, category, description, uploaded_at '
+                  'FROM photos ORDER BY uploaded_at DESC')
+SQL_PHOTOS_BY_CAT = ('SELECT id, filename, category, description, uploaded_at '
+                     'FROM photos WHERE category = ? ORDER BY uploaded_at DESC')
+SQL_VIDEOS_ALL = ('SELECT id, filename, title, description, uploaded_at '
+                  'FROM videos ORDER BY uploaded_at DESC')
+SQL_DONATIONS_RECENT = ('SELECT id, donor_name, amount, purpose, provider, reference_number, created_at '
+                        'FROM donations ORDER BY created_at DESC LIMIT 100')
+
 # Database functions
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(app.config['DATABASE'])
-    conn.row_factory = sqlite3.Row
+def connect_db(database, readonly=False, backend=None):
+    """Open a tuned SQLite connection"""
+    if (backend or app.config['DB_BACKEND']) == 'apsw':
+        # apsw is always in autocommit mode and returns plain tuples
+        flags = (apsw.SQLITE_OPEN_READONLY if readonly
+                 else apsw.SQLITE_OPEN_READWRITE | apsw.SQLITE_OPEN_CREATE)
+        conn = apsw.Connection(database, flags=flags)
+    elif readonly:
+        uri = f"file:{pathname2url(os.path.abspath(database))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+    else:
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(database, isolation_level=None, check_same_thread=False,
+                               cached_statements=256)
+    if isinstance(conn, sqlite3.Connection):
+        conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+def is_busy_error(error):
+    """Whether an exception means another connection holds the lock"""
+    if apsw is not None and isinstance(error, apsw.BusyError):
+        return True
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    # sqlite_errorcode and sqlite3.SQLITE_BUSY only exist on Python 3.11+
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code == getattr(sqlite3, 'SQLITE_BUSY', 5)
+    return 'database is locked' in str(error)
+
+def begin_immediate(conn):
+    """Start a write transaction, retrying with a (gevent-friendly) sleep while busy"""
+    deadline = time.monotonic() + WRITE_LOCK_TIMEOUT
+    while True:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            return
+        except Exception as e:
+            if not is_busy_error(e) or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+
+def in_transaction(conn):
+    """Whether a transaction is open on either database backend"""
+    if isinstance(conn, sqlite3.Connection):
+        return conn.in_transaction
+    return not conn.getautocommit()
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections"""
+
+    def __init__(self, database, size, readonly=False):
+        self.database = database
+        self.readonly = readonly
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(connect_db(database, readonly))
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; writes run in a single IMMEDIATE transaction"""
+        conn = self._connections.get()
+        try:
+            if self.readonly:
+                yield conn
+                return
+            begin_immediate(conn)
+            yield conn
+            conn.execute('COMMIT')
+        finally:
+            # A failed body or COMMIT must not return a connection that still
+            # holds the write lock; replace it if it can't be rolled back
+            if not self.readonly and in_transaction(conn):
+                try:
+                    conn.execute('ROLLBACK')
+                except Exception:
+                    conn.close()
+                    conn = connect_db(self.database)
+            self._connections.put(conn)
+
+# One writer and one reader per CPU, created lazily so each worker process gets its own
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_db(readonly=False):
+    """Check out a pooled database connection (use as a context manager)"""
+    pool = _pools.get(readonly)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(readonly)
+            if pool is None:
+                size = (os.cpu_count() or 4) if readonly else 1
+                pool = _pools[readonly] = ConnectionPool(app.config['DATABASE'], size, readonly)
+    return pool.connection()
+
+def iter_rows(cursor, size=100):
+    """Yield query results in fetchmany() batches"""
+    if not hasattr(cursor, 'fetchmany'):
+        # apsw cursors already step one row at a time
+        yield from cursor
+        return
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            return
+        yield from batch
+
+def last_insert_id(conn, cursor):
+    """Row id of the last INSERT on either database backend"""
+    if isinstance(conn, sqlite3.Connection):
+        return cursor.lastrowid
+    return conn.last_insert_rowid()
+
 def init_db():
     """Initialize database with tables"""
-    conn = get_db()
+    conn = connect_db(app.config['DATABASE'], backend='sqlite3')
+    # Runs before serving, so it can wait on other workers regardless of gevent
+    conn.execute('PRAGMA busy_timeout=5000')
+    conn.execute('PRAGMA journal_mode=WAL')
     c = conn.cursor()
     
     # Admin users table
@@ -128,28 +377,96 @@ def init_db():
                   read BOOLEAN DEFAULT 0,
                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
     
-    # Insert default admin users
+    # SMS delivery log (written by the background SMS workers)
+    c.execute('''CREATE TABLE IF NOT EXISTS sms_log
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  reference_number TEXT,
+                  phone TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  response TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Indexes matching the list/stats query filters and sort order
+    c.execute('CREATE INDEX IF NOT EXISTS idx_photos_cat_date ON photos(category, uploaded_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_photos_uploaded ON photos(uploaded_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_donations_status_purpose ON donations(status, purpose)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_donations_created ON donations(created_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_donations_status_created ON donations(status, created_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_news_pub_created ON news(published, created_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_videos_uploaded ON videos(uploaded_at DESC)')
+    
+    # Insert default admin users (only into an empty table, since hashing is slow)
     default_admins = [
         ('admin', 'sda2025', 'Administrator', 'admin@sefwihumjibresda.org'),
         ('pastor', 'pastor123', 'Pastor', 'pastor@sefwihumjibresda.org'),
         ('elder', 'elder456', 'Elder', 'elder@sefwihumjibresda.org')
     ]
     
-    for username, password, role, email in default_admins:
-        try:
-            password_hash = generate_password_hash(password)
-            c.execute('INSERT INTO admins (username, password_hash, role, email) VALUES (?, ?, ?, ?)',
-                     (username, password_hash, role, email))
-        except sqlite3.IntegrityError:
-            pass
+    c.execute('SELECT 1 FROM admins LIMIT 1')
+    if c.fetchone() is None:
+        c.executemany('INSERT OR IGNORE INTO admins (username, password_hash, role, email) VALUES (?, ?, ?, ?)',
+                      [(username, generate_password_hash(password), role, email)
+                       for username, password, role, email in default_admins])
     
     conn.commit()
     conn.close()
     logger.info("Database initialized successfully")
 
-def allowed_file(filename, allowed_extensions):
+def ensure_db():
+    """Run init_db, serialized across worker processes with a file lock"""
+    with open(app.config['DATABASE'] + '.init.lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        init_db()
+
+# Create/migrate the schema on import so every entry point (gunicorn workers,
+# flask run) serves from an initialized WAL database with current indexes
+ensure_db()
+
+def allowed_file(filename, suffixes):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return filename.lower().endswith(suffixes)
+
+def save_upload(file, filepath, large=False):
+    """Save an uploaded file, streaming large bodies with a big write buffer"""
+    if not large:
+        file.save(filepath)
+        return
+    with open(filepath, 'wb', buffering=0) as out:
+        shutil.copyfileobj(file.stream, out, length=UPLOAD_BUFFER_SIZE)
+
+def save_uploads(tasks, large=False):
+    """Save (file, filepath) pairs concurrently; if any save fails, remove the
+    whole batch and raise"""
+    try:
+        if len(tasks) == 1:
+            save_upload(*tasks[0], large)
+        else:
+            futures = [_io_pool.submit(save_upload, file, filepath, large) for file, filepath in tasks]
+            # Let every save finish before the request (and its file streams) can end;
+            # result() waits cooperatively under gevent as well
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+    except Exception:
+        for _, filepath in tasks:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+        raise
+
+# Shared HTTP session so SMS/payment calls reuse keep-alive TLS connections.
+# Retry only covers idempotent methods, so payment POSTs are never resent.
+HTTP_TIMEOUT = (3, 10)  # (connect, read) seconds
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                    max_retries=Retry(total=2, backoff_factor=0.2)))
 
 # SMS sending function with multiple provider support
 def send_sms(phone_number, message):
@@ -180,7 +497,7 @@ def send_sms_hubtel(phone_number, message):
         return {"status": "error", "message": "SMS provider not configured"}
     
     url = "https://smsc.hubtel.com/v1/messages/send"
-    response = requests.get(url, params={
+    response = _http.get(url, timeout=HTTP_TIMEOUT, params={
         "clientsecret": api_secret,
         "clientid": api_key,
         "from": sender_id,
@@ -200,7 +517,7 @@ def send_sms_mnotify(phone_number, message):
         return {"status": "error", "message": "SMS provider not configured"}
     
     url = "https://api.mnotify.com/api/sms/quick"
-    response = requests.post(url, json={
+    response = _http.post(url, timeout=HTTP_TIMEOUT, json={
         "key": api_key,
         "to": phone_number,
         "msg": message,
@@ -209,6 +526,31 @@ def send_sms_mnotify(phone_number, message):
     
     return response.json()
 
+# Background SMS delivery so requests don't wait on the SMS provider
+_sms_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='sms')
+
+def queue_sms(phone_number, message, reference=None):
+    """Send SMS on a worker thread and record the outcome in sms_log"""
+    future = _sms_pool.submit(send_sms, phone_number, message)
+    future.add_done_callback(lambda f: log_sms_result(phone_number, reference, f))
+    return future
+
+def log_sms_result(phone_number, reference, future):
+    """Record a finished SMS send"""
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+    
+    try:
+        with get_db() as conn:
+            conn.execute('''INSERT INTO sms_log (reference_number, phone, status, response)
+                            VALUES (?, ?, ?, ?)''',
+                         (reference, phone_number, str(result.get('status', 'unknown')),
+                          json.dumps(result, default=str)))
+    except Exception as e:
+        logger.error(f"SMS log error: {str(e)}")
+
 # Mobile Money payment processing
 def process_mobile_money(provider, phone_number, amount, purpose, donor_name):
     """Process mobile money payment"""
@@ -245,7 +587,7 @@ def process_hubtel_payment(provider, phone_number, amount, purpose, donor_name,
     
     url = f"https://api.hubtel.com/v1/merchantaccount/merchants/{merchant_id}/receive/mobilemoney"
     
-    response = requests.post(url, json={
+    response = _http.post(url, timeout=HTTP_TIMEOUT, json={
         "CustomerName": donor_name,
         "CustomerMsisdn": phone_number,
         "CustomerEmail": "",
@@ -277,7 +619,7 @@ def process_paystack_payment(provider, phone_number, amount, purpose, donor_name
     # Convert amount to kobo/pesewas (multiply by 100)
     amount_in_pesewas = int(float(amount) * 100)
     
-    response = requests.post(url, json={
+    response = _http.post(url, timeout=HTTP_TIMEOUT, json={
         "email": f"{reference}@donation.church",
         "amount": amount_in_pesewas,
         "mobile_money": {
@@ -295,6 +637,74 @@ def process_paystack_payment(provider, phone_number, amount, purpose, donor_name
         "message": result.get('message', 'Payment processed')
     }
 
+# Admin credential cache. The admins row is always read fresh; a login skips the
+# slow password hash check only when the submitted password matches one verified
+# against that same stored hash within ADMIN_LOGIN_TTL. Password changes and
+# deleted admins therefore take effect immediately in every worker.
+ADMIN_LOGIN_TTL = 300  # seconds
+_verified_logins = {}  # username -> (password digest, password_hash, expires)
+_verified_logins_lock = threading.Lock()
+
+def get_admin(username):
+    """Look up (password_hash, role, email) for an admin username"""
+    with get_db(readonly=True) as conn:
+        c = conn.cursor()
+        c.execute('SELECT password_hash, role, email FROM admins WHERE username = ?', (username,))
+        result = c.fetchone()
+    return tuple(result) if result else None
+
+def password_digest(password):
+    """Keyed digest of a password, so plaintext is never kept in memory"""
+    return hmac.new(app.config['SECRET_KEY'].encode(), password.encode(), hashlib.sha256).digest()
+
+def verify_admin(username, password):
+    """Return the admin record if the credentials are valid, else None"""
+    admin = get_admin(username)
+    if not admin:
+        return None
+    
+    password_hash = admin[0]
+    digest = password_digest(password)
+    with _verified_logins_lock:
+        cached = _verified_logins.get(username)
+    if (cached and cached[2] > time.monotonic()
+            and hmac.compare_digest(cached[1], password_hash)
+            and hmac.compare_digest(cached[0], digest)):
+        return admin
+    
+    if not check_password_hash(password_hash, password):
+        return None
+    
+    with _verified_logins_lock:
+        _verified_logins[username] = (digest, password_hash, time.monotonic() + ADMIN_LOGIN_TTL)
+    return admin
+
+# Donation statistics cache
+DONATION_STATS_TTL = 60  # seconds
+_donation_stats = {'value': None, 'expires': 0.0, 'generation': 0}
+_donation_stats_lock = threading.Lock()
+
+def get_cached_donation_stats():
+    """Return (cached aggregates or None, cache generation)"""
+    with _donation_stats_lock:
+        if _donation_stats['expires'] > time.monotonic():
+            return _donation_stats['value'], _donation_stats['generation']
+        return None, _donation_stats['generation']
+
+def store_donation_stats(value, generation):
+    """Cache aggregates unless a donation was recorded while computing them"""
+    with _donation_stats_lock:
+        if _donation_stats['generation'] == generation:
+            _donation_stats['value'] = value
+            _donation_stats['expires'] = time.monotonic() + DONATION_STATS_TTL
+
+def invalidate_donation_stats():
+    """Drop cached aggregates after a new donation"""
+    with _donation_stats_lock:
+        _donation_stats['value'] = None
+        _donation_stats['expires'] = 0.0
+        _donation_stats['generation'] += 1
+
 # API Routes
 
 @app.route('/api/health')
@@ -317,13 +727,9 @@ def admin_login():
         return jsonify({'success': False, 'message': 'Missing credentials'}), 400
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        c.execute('SELECT password_hash, role, email FROM admins WHERE username = ?', (username,))
-        result = c.fetchone()
-        conn.close()
+        result = verify_admin(username, password)
         
-        if result and check_password_hash(result[0], password):
+        if result:
             logger.info(f"Successful login: {username}")
             return jsonify({
                 'success': True,
@@ -350,25 +756,30 @@ def upload_photos():
     uploaded_by = request.form.get('uploaded_by', 'admin')
     
     uploaded_files = []
+    rows = []
+    tasks = []
+    large = (request.content_length or 0) > UPLOAD_BUFFER_SIZE
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        
-        for file in files:
-            if file and allowed_file(file.filename, ALLOWED_IMAGES):
-                filename = secure_filename(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
+        for i, file in enumerate(files):
+            if file and allowed_file(file.filename, IMAGE_SUFFIXES):
+                filename = secure_filename(f"{timestamp}_{i:03d}_{file.filename}")
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'photos', filename)
-                file.save(filepath)
                 
-                c.execute('''INSERT INTO photos (filename, category, description, uploaded_by)
-                            VALUES (?, ?, ?, ?)''',
-                         (filename, category, description, uploaded_by))
+                tasks.append((file, filepath))
+                rows.append((filename, category, description, uploaded_by))
                 uploaded_files.append(filename)
-                logger.info(f"Photo uploaded: {filename} by {uploaded_by}")
         
-        conn.commit()
-        conn.close()
+        # Write every file before recording any of them
+        save_uploads(tasks, large)
+        
+        if rows:
+            with get_db() as conn:
+                conn.executemany(SQL_INSERT_PHOTO, rows)
+        
+        for filename in uploaded_files:
+            logger.info(f"Photo uploaded: {filename} by {uploaded_by}")
         
         return jsonify({
             'success': True,
@@ -391,25 +802,30 @@ def upload_videos():
     uploaded_by = request.form.get('uploaded_by', 'admin')
     
     uploaded_files = []
+    rows = []
+    tasks = []
+    large = (request.content_length or 0) > UPLOAD_BUFFER_SIZE
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        
-        for file in files:
-            if file and allowed_file(file.filename, ALLOWED_VIDEOS):
-                filename = secure_filename(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
+        for i, file in enumerate(files):
+            if file and allowed_file(file.filename, VIDEO_SUFFIXES):
+                filename = secure_filename(f"{timestamp}_{i:03d}_{file.filename}")
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'videos', filename)
-                file.save(filepath)
                 
-                c.execute('''INSERT INTO videos (filename, title, description, uploaded_by)
-                            VALUES (?, ?, ?, ?)''',
-                         (filename, title, description, uploaded_by))
+                tasks.append((file, filepath))
+                rows.append((filename, title, description, uploaded_by))
                 uploaded_files.append(filename)
-                logger.info(f"Video uploaded: {filename} by {uploaded_by}")
         
-        conn.commit()
-        conn.close()
+        # Write every file before recording any of them
+        save_uploads(tasks, large)
+        
+        if rows:
+            with get_db() as conn:
+                conn.executemany(SQL_INSERT_VIDEO, rows)
+        
+        for filename in uploaded_files:
+            logger.info(f"Video uploaded: {filename} by {uploaded_by}")
         
         return jsonify({
             'success': True,
@@ -432,25 +848,30 @@ def upload_documents():
     uploaded_by = request.form.get('uploaded_by', 'admin')
     
     uploaded_files = []
+    rows = []
+    tasks = []
+    large = (request.content_length or 0) > UPLOAD_BUFFER_SIZE
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        
-        for file in files:
-            if file and allowed_file(file.filename, ALLOWED_DOCS):
-                filename = secure_filename(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
+        for i, file in enumerate(files):
+            if file and allowed_file(file.filename, DOC_SUFFIXES):
+                filename = secure_filename(f"{timestamp}_{i:03d}_{file.filename}")
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'documents', filename)
-                file.save(filepath)
                 
-                c.execute('''INSERT INTO documents (filename, title, category, uploaded_by)
-                            VALUES (?, ?, ?, ?)''',
-                         (filename, title, category, uploaded_by))
+                tasks.append((file, filepath))
+                rows.append((filename, title, category, uploaded_by))
                 uploaded_files.append(filename)
-                logger.info(f"Document uploaded: {filename} by {uploaded_by}")
         
-        conn.commit()
-        conn.close()
+        # Write every file before recording any of them
+        save_uploads(tasks, large)
+        
+        if rows:
+            with get_db() as conn:
+                conn.executemany(SQL_INSERT_DOCUMENT, rows)
+        
+        for filename in uploaded_files:
+            logger.info(f"Document uploaded: {filename} by {uploaded_by}")
         
         return jsonify({
             'success': True,
@@ -476,19 +897,17 @@ def create_news():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        if image and allowed_file(image.filename, ALLOWED_IMAGES):
+        if image and allowed_file(image.filename, IMAGE_SUFFIXES):
             filename = secure_filename(f"news_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{image.filename}")
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'photos', filename)
             image.save(filepath)
             
-            conn = get_db()
-            c = conn.cursor()
-            c.execute('''INSERT INTO news (title, content, image_filename, author)
-                        VALUES (?, ?, ?, ?)''',
-                     (title, content, filename, author))
-            news_id = c.lastrowid
-            conn.commit()
-            conn.close()
+            with get_db() as conn:
+                c = conn.cursor()
+                c.execute('''INSERT INTO news (title, content, image_filename, author)
+                            VALUES (?, ?, ?, ?)''',
+                         (title, content, filename, author))
+                news_id = last_insert_id(conn, c)
             
             logger.info(f"News created: {title} by {author}")
             
@@ -507,23 +926,16 @@ def create_news():
 def list_news():
     """List all news posts"""
     try:
-        conn = get_db()
-        c = conn.cursor()
-        c.execute('''SELECT id, title, content, image_filename, author, created_at 
-                    FROM news WHERE published = 1 ORDER BY created_at DESC''')
-        rows = c.fetchall()
-        conn.close()
-        
-        news_list = []
-        for row in rows:
-            news_list.append({
+        with get_db(readonly=True) as conn:
+            c = conn.execute(SQL_NEWS_PUBLISHED)
+            news_list = [{
                 'id': row[0],
                 'title': row[1],
                 'content': row[2],
-                'image': f'/uploads/photos/{row[3]}',
+                'image': PHOTO_URL_PREFIX + row[3],
                 'author': row[4],
                 'date': row[5]
-            })
+            } for row in iter_rows(c)]
         
         return jsonify(news_list)
     except Exception as e:
@@ -536,28 +948,19 @@ def list_photos():
     category = request.args.get('category')
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        
-        if category:
-            c.execute('''SELECT id, filename, category, description, uploaded_at 
-                        FROM photos WHERE category = ? ORDER BY uploaded_at DESC''', (category,))
-        else:
-            c.execute('''SELECT id, filename, category, description, uploaded_at 
-                        FROM photos ORDER BY uploaded_at DESC''')
-        
-        rows = c.fetchall()
-        conn.close()
-        
-        photos = []
-        for row in rows:
-            photos.append({
+        with get_db(readonly=True) as conn:
+            if category:
+                c = conn.execute(SQL_PHOTOS_BY_CAT, (category,))
+            else:
+                c = conn.execute(SQL_PHOTOS_ALL)
+            
+            photos = [{
                 'id': row[0],
-                'url': f'/uploads/photos/{row[1]}',
+                'url': PHOTO_URL_PREFIX + row[1],
                 'category': row[2],
                 'description': row[3],
                 'date': row[4]
-            })
+            } for row in iter_rows(c)]
         
         return jsonify(photos)
     except Exception as e:
@@ -568,22 +971,15 @@ def list_photos():
 def list_videos():
     """List all videos"""
     try:
-        conn = get_db()
-        c = conn.cursor()
-        c.execute('''SELECT id, filename, title, description, uploaded_at 
-                    FROM videos ORDER BY uploaded_at DESC''')
-        rows = c.fetchall()
-        conn.close()
-        
-        videos = []
-        for row in rows:
-            videos.append({
+        with get_db(readonly=True) as conn:
+            c = conn.execute(SQL_VIDEOS_ALL)
+            videos = [{
                 'id': row[0],
-                'url': f'/uploads/videos/{row[1]}',
+                'url': VIDEO_URL_PREFIX + row[1],
                 'title': row[2],
                 'description': row[3],
                 'date': row[4]
-            })
+            } for row in iter_rows(c)]
         
         return jsonify(videos)
     except Exception as e:
@@ -614,23 +1010,22 @@ def process_donation():
             transaction_id = payment_result.get('transaction_id', '')
             
             # Save donation to database
-            conn = get_db()
-            c = conn.cursor()
-            c.execute('''INSERT INTO donations 
-                        (donor_name, donor_email, donor_phone, amount, purpose, provider, 
-                         reference_number, transaction_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                     (donor_name, donor_email, donor_phone, amount, purpose, provider, 
-                      reference, transaction_id))
-            conn.commit()
-            conn.close()
+            with get_db() as conn:
+                c = conn.cursor()
+                c.execute('''INSERT INTO donations 
+                            (donor_name, donor_email, donor_phone, amount, purpose, provider, 
+                             reference_number, transaction_id)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                         (donor_name, donor_email, donor_phone, amount, purpose, provider, 
+                          reference, transaction_id))
+            invalidate_donation_stats()
             
             # Send SMS confirmation
             sms_message = (f"Thank you {donor_name} for your donation of GHS {amount} "
                           f"to Sefwi Humjibre SDA Church for {purpose}. "
                           f"Reference: {reference}. May God bless you abundantly!")
             
-            sms_result = send_sms(donor_phone, sms_message)
+            queue_sms(donor_phone, sms_message, reference)
             
             logger.info(f"Donation processed: {reference} - GHS {amount} from {donor_name}")
             
@@ -639,7 +1034,7 @@ def process_donation():
                 'reference': reference,
                 'transaction_id': transaction_id,
                 'message': 'Donation processed successfully',
-                'sms_sent': sms_result.get('status') == 'success'
+                'sms_sent': 'queued'
             })
         else:
             logger.error(f"Payment failed: {payment_result['message']}")
@@ -655,17 +1050,9 @@ def process_donation():
 def list_donations():
     """List all donations (admin only)"""
     try:
-        conn = get_db()
-        c = conn.cursor()
-        c.execute('''SELECT id, donor_name, amount, purpose, provider, 
-                     reference_number, created_at 
-                     FROM donations ORDER BY created_at DESC LIMIT 100''')
-        rows = c.fetchall()
-        conn.close()
-        
-        donations = []
-        for row in rows:
-            donations.append({
+        with get_db(readonly=True) as conn:
+            c = conn.execute(SQL_DONATIONS_RECENT)
+            donations = [{
                 'id': row[0],
                 'donor': row[1],
                 'amount': row[2],
@@ -673,7 +1060,7 @@ def list_donations():
                 'provider': row[4],
                 'reference': row[5],
                 'date': row[6]
-            })
+            } for row in iter_rows(c)]
         
         return jsonify(donations)
     except Exception as e:
@@ -684,35 +1071,38 @@ def list_donations():
 def donation_stats():
     """Get donation statistics"""
     try:
-        conn = get_db()
-        c = conn.cursor()
+        totals, generation = get_cached_donation_stats()
         
-        # Total donations
-        c.execute('SELECT COUNT(*), SUM(amount) FROM donations WHERE status = "completed"')
-        total_count, total_amount = c.fetchone()
-        
-        # By purpose
-        c.execute('''SELECT purpose, COUNT(*), SUM(amount) 
-                    FROM donations WHERE status = "completed" 
-                    GROUP BY purpose''')
-        by_purpose = [{'purpose': row[0], 'count': row[1], 'amount': row[2]} 
+        with get_db(readonly=True) as conn:
+            c = conn.cursor()
+            
+            if totals is None:
+                # Total donations
+                c.execute("SELECT COUNT(*), SUM(amount) FROM donations WHERE status = 'completed'")
+                total_count, total_amount = c.fetchone()
+                
+                # By purpose
+                c.execute('''SELECT purpose, COUNT(*), SUM(amount) 
+                            FROM donations WHERE status = 'completed' 
+                            GROUP BY purpose''')
+                by_purpose = [{'purpose': row[0], 'count': row[1], 'amount': row[2]} 
+                             for row in c.fetchall()]
+                
+                totals = {
+                    'total_count': total_count or 0,
+                    'total_amount': total_amount or 0,
+                    'by_purpose': by_purpose
+                }
+                store_donation_stats(totals, generation)
+            
+            # Recent donations
+            c.execute('''SELECT donor_name, amount, purpose, created_at 
+                        FROM donations WHERE status = 'completed' 
+                        ORDER BY created_at DESC LIMIT 10''')
+            recent = [{'donor': row[0], 'amount': row[1], 'purpose': row[2], 'date': row[3]} 
                      for row in c.fetchall()]
         
-        # Recent donations
-        c.execute('''SELECT donor_name, amount, purpose, created_at 
-                    FROM donations WHERE status = "completed" 
-                    ORDER BY created_at DESC LIMIT 10''')
-        recent = [{'donor': row[0], 'amount': row[1], 'purpose': row[2], 'date': row[3]} 
-                 for row in c.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'total_count': total_count or 0,
-            'total_amount': total_amount or 0,
-            'by_purpose': by_purpose,
-            'recent': recent
-        })
+        return jsonify({**totals, 'recent': recent})
     except Exception as e:
         logger.error(f"Donation stats error: {str(e)}")
         return jsonify({'error': 'Failed to fetch statistics'}), 500
@@ -731,13 +1121,11 @@ def submit_contact():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        conn = get_db()
-        c = conn.cursor()
-        c.execute('''INSERT INTO contact_messages (name, email, subject, message)
-                    VALUES (?, ?, ?, ?)''',
-                 (name, email, subject, message))
-        conn.commit()
-        conn.close()
+        with get_db() as conn:
+            c = conn.cursor()
+            c.execute('''INSERT INTO contact_messages (name, email, subject, message)
+                        VALUES (?, ?, ?, ?)''',
+                     (name, email, subject, message))
         
         logger.info(f"Contact message from: {name} ({email})")
         
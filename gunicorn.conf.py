@@ -0,0 +1,29 @@
+# gunicorn.conf.py - Production server settings
+# Usage: gunicorn -c gunicorn.conf.py
+# The Flask app lives in 1.py in this repo, so its module name is "1".
+import os
+
+wsgi_app = os.getenv('WSGI_APP', '1:app')
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# gevent workers so SMS/payment HTTP calls don't park a worker. gevent turns
+# threads into greenlets, but blocking disk and SQLite calls never yield, so the
+# app adapts when it detects gevent (GEVENT_ACTIVE in 1.py):
+#   - uploaded files are saved on gevent's native-thread pool, so concurrent
+#     saves still overlap and don't stall the event loop;
+#   - SQLite's busy_timeout drops from 5000ms to 50ms, and writers wait for the
+#     write lock with a cooperative sleep (up to 5s) instead of sleeping in C,
+#     which would freeze every connection in the worker;
+#   - the SMS pool stays on greenlets, since its HTTP calls yield on the socket.
+worker_class = 'gevent'
+workers = int(os.getenv('WEB_WORKERS', 4))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+
+# Import the app in each worker: the SQLite pools, the log listener and the
+# SMS/upload thread pools must not be created in the master and shared by fork.
+# Each worker runs the schema/WAL setup (ensure_db in 1.py) on import, under a
+# file lock, before it serves any request.
+preload_app = False
+
+timeout = int(os.getenv('WORKER_TIMEOUT', 60))